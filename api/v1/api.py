@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from app.api.v1.endpoints import api_dependency
+
+api_router = APIRouter()
+
+# Import and include routers
+# from app.api.v1.endpoints import supply_chain, risk_assessment, economic_modeling
+# api_router.include_router(supply_chain.router, prefix="/supply-chain", tags=["Supply Chain"])
+# api_router.include_router(risk_assessment.router, prefix="/risk-assessment", tags=["Risk Assessment"])
+# api_router.include_router(economic_modeling.router, prefix="/economic-modeling", tags=["Economic Modeling"])
+
+api_router.include_router(api_dependency.router, prefix="/api-dependencies", tags=["API Dependencies"])
\ No newline at end of file
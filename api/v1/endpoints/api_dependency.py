@@ -1,11 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from typing import List, Optional
-from app.db.session import get_db
-from app.models.api_dependency import APIDependency, SupplyChainNode, QualityIncident
+import asyncio
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from sqlalchemy import insert, select, text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncScalarResult, AsyncSession
+from sqlalchemy.orm import joinedload, raiseload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import Any, AsyncIterator, Dict, Optional, Type
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.db.session import async_session, get_db
+from app.models.api_dependency import (
+    APIDependency,
+    SupplyChainNode,
+    QualityIncident,
+    RISK_SUMMARY_SELECT,
+    RISK_SUMMARY_VIEW
+)
 from app.schemas.api_dependency import (
     APIDependency as APIDependencySchema,
     APIDependencyCreate,
+    APIDependencyPage,
     SupplyChainNode as SupplyChainNodeSchema,
     SupplyChainNodeCreate,
     QualityIncident as QualityIncidentSchema,
@@ -14,91 +30,200 @@ from app.schemas.api_dependency import (
 
 router = APIRouter()
 
+# In debug runs any relationship access not loaded below raises, so a
+# missing eager load is caught in development rather than in production
+_RAISE_ON_LAZY_LOAD = (raiseload("*"),) if settings.DEBUG else ()
+
+# Collections serialized by APIDependencySchema are loaded up front
+_WITH_CHILDREN = (
+    selectinload(APIDependency.supply_chain_nodes),
+    selectinload(APIDependency.quality_incidents),
+    *_RAISE_ON_LAZY_LOAD,
+)
+# A single row is cheaper to fetch with its children in one joined query
+_WITH_CHILDREN_JOINED = (
+    joinedload(APIDependency.supply_chain_nodes),
+    joinedload(APIDependency.quality_incidents),
+    *_RAISE_ON_LAZY_LOAD,
+)
+
+# Summary read from the view; cleared whenever the counts change. The live
+# variant exists to bypass staleness and is never cached.
+_summary_cache = TTLCache(settings.RISK_SUMMARY_CACHE_TTL)
+_SUMMARY_CACHE_KEY = "view"
+
+# PostgreSQL SQLSTATE for foreign_key_violation
+_FOREIGN_KEY_VIOLATION = "23503"
+
+_summary_refresh_lock = asyncio.Lock()
+_summary_refresh_requested = False
+
+async def refresh_risk_summary() -> None:
+    """Refresh the risk summary view, coalescing requests made while a refresh is running."""
+    global _summary_refresh_requested
+    _summary_refresh_requested = True
+    if _summary_refresh_lock.locked():
+        # The running refresh loops once more and picks up this write
+        return
+    async with _summary_refresh_lock:
+        while _summary_refresh_requested:
+            _summary_refresh_requested = False
+            async with async_session() as db:
+                # A full refresh can outlast the connection-wide statement_timeout
+                await db.execute(text("SET LOCAL statement_timeout = 0"))
+                await db.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {RISK_SUMMARY_VIEW}"))
+                await db.commit()
+            _summary_cache.clear()
+
+async def _insert_child(
+    db: AsyncSession,
+    model: Type[Any],
+    api_dependency_id: int,
+    values: Dict[str, Any]
+) -> Optional[Any]:
+    """Insert a child row, returning None if the parent does not exist.
+
+    The foreign key on api_dependency_id checks the parent as part of the
+    INSERT, so no separate lookup is needed.
+    """
+    try:
+        result = await db.execute(
+            insert(model).values(api_dependency_id=api_dependency_id, **values).returning(model)
+        )
+    except IntegrityError as exc:
+        if getattr(exc.orig, "sqlstate", None) != _FOREIGN_KEY_VIOLATION:
+            raise
+        await db.rollback()
+        return None
+    return result.scalar_one()
+
 @router.post("/", response_model=APIDependencySchema)
-def create_api_dependency(
+async def create_api_dependency(
     api_dependency: APIDependencyCreate,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_db)
 ):
-    db_api_dependency = APIDependency(**api_dependency.dict())
-    db.add(db_api_dependency)
-    db.commit()
-    db.refresh(db_api_dependency)
+    # RETURNING hands back the generated id and timestamps without a refresh
+    result = await db.execute(
+        insert(APIDependency).values(**api_dependency.model_dump(exclude_unset=True)).returning(APIDependency)
+    )
+    db_api_dependency = result.scalar_one()
+    await db.commit()
+    # A new row has no children; mark the collections loaded and empty
+    set_committed_value(db_api_dependency, "supply_chain_nodes", [])
+    set_committed_value(db_api_dependency, "quality_incidents", [])
+    # The cached summary is cleared once the refreshed view has the new row
+    background_tasks.add_task(refresh_risk_summary)
     return db_api_dependency
 
-@router.get("/", response_model=List[APIDependencySchema])
-def read_api_dependencies(
-    skip: int = 0,
-    limit: int = 100,
+# Built once at import; the listing serializes rows through it directly
+# instead of having FastAPI validate and encode a response model
+_ITEM_ADAPTER = TypeAdapter(APIDependencySchema)
+# Rows fetched per round-trip from the server-side cursor
+_STREAM_BATCH_SIZE = 200
+
+async def _stream_page(result: AsyncScalarResult) -> AsyncIterator[bytes]:
+    """Stream a page as JSON, encoding rows as they arrive from the cursor."""
+    yield b'{"items":['
+    last_id = None
+    async for partition in result.partitions():
+        chunk = b",".join(
+            _ITEM_ADAPTER.dump_json(_ITEM_ADAPTER.validate_python(obj, from_attributes=True))
+            for obj in partition
+        )
+        yield chunk if last_id is None else b"," + chunk
+        last_id = partition[-1].id
+    next_cursor = b"null" if last_id is None else str(last_id).encode()
+    yield b'],"next_cursor":' + next_cursor + b"}"
+
+@router.get("/", response_class=StreamingResponse, responses={200: {"model": APIDependencyPage}})
+async def read_api_dependencies(
+    after_id: Optional[int] = Query(None, ge=0),
+    limit: int = Query(100, ge=1, le=500),
     country: Optional[str] = None,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    query = db.query(APIDependency)
+    # Keyset pagination: seek past the last id seen instead of scanning
+    # and discarding skipped rows with OFFSET.
+    query = select(APIDependency).options(*_WITH_CHILDREN)
     if country:
-        query = query.filter(APIDependency.country_of_origin == country)
-    return query.offset(skip).limit(limit).all()
+        query = query.where(APIDependency.country_of_origin == country)
+    if after_id is not None:
+        query = query.where(APIDependency.id > after_id)
+    query = query.order_by(APIDependency.id).limit(limit)
+    # Run the query before the response starts, so a failure is still a 5xx;
+    # get_db closes the session only after the streamed body has been sent
+    result = await db.stream_scalars(query.execution_options(yield_per=_STREAM_BATCH_SIZE))
+    return StreamingResponse(_stream_page(result), media_type="application/json")
 
 @router.get("/{api_dependency_id}", response_model=APIDependencySchema)
-def read_api_dependency(
+async def read_api_dependency(
     api_dependency_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_api_dependency = db.query(APIDependency).filter(APIDependency.id == api_dependency_id).first()
+    result = await db.execute(
+        select(APIDependency).options(*_WITH_CHILDREN_JOINED).where(APIDependency.id == api_dependency_id)
+    )
+    db_api_dependency = result.unique().scalar_one_or_none()
     if db_api_dependency is None:
         raise HTTPException(status_code=404, detail="API dependency not found")
     return db_api_dependency
 
 @router.post("/{api_dependency_id}/supply-chain-nodes", response_model=SupplyChainNodeSchema)
-def create_supply_chain_node(
+async def create_supply_chain_node(
     api_dependency_id: int,
     supply_chain_node: SupplyChainNodeCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_api_dependency = db.query(APIDependency).filter(APIDependency.id == api_dependency_id).first()
-    if db_api_dependency is None:
-        raise HTTPException(status_code=404, detail="API dependency not found")
-    
-    db_supply_chain_node = SupplyChainNode(
-        api_dependency_id=api_dependency_id,
-        **supply_chain_node.dict()
+    db_supply_chain_node = await _insert_child(
+        db, SupplyChainNode, api_dependency_id, supply_chain_node.model_dump(exclude_unset=True)
     )
-    db.add(db_supply_chain_node)
-    db.commit()
-    db.refresh(db_supply_chain_node)
+    if db_supply_chain_node is None:
+        raise HTTPException(status_code=404, detail="API dependency not found")
+    await db.commit()
     return db_supply_chain_node
 
 @router.post("/{api_dependency_id}/quality-incidents", response_model=QualityIncidentSchema)
-def create_quality_incident(
+async def create_quality_incident(
     api_dependency_id: int,
     quality_incident: QualityIncidentCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    db_api_dependency = db.query(APIDependency).filter(APIDependency.id == api_dependency_id).first()
-    if db_api_dependency is None:
-        raise HTTPException(status_code=404, detail="API dependency not found")
-    
-    db_quality_incident = QualityIncident(
-        api_dependency_id=api_dependency_id,
-        **quality_incident.dict()
+    db_quality_incident = await _insert_child(
+        db, QualityIncident, api_dependency_id, quality_incident.model_dump(exclude_unset=True)
     )
-    db.add(db_quality_incident)
-    db.commit()
-    db.refresh(db_quality_incident)
+    if db_quality_incident is None:
+        raise HTTPException(status_code=404, detail="API dependency not found")
+    await db.commit()
     return db_quality_incident
 
 @router.get("/risk-assessment/summary")
-def get_risk_assessment_summary(
-    db: Session = Depends(get_db)
+async def get_risk_assessment_summary(
+    response: Response,
+    live: bool = False,
+    db: AsyncSession = Depends(get_db)
 ):
-    # Calculate risk metrics
-    high_risk_dependencies = db.query(APIDependency).filter(
-        APIDependency.us_import_dependency > 70,
-        APIDependency.quality_rating < 7
-    ).count()
-    
-    total_dependencies = db.query(APIDependency).count()
-    
-    return {
+    if live:
+        response.headers["Cache-Control"] = "no-store"
+    else:
+        response.headers["Cache-Control"] = f"public, max-age={settings.RISK_SUMMARY_CACHE_TTL}"
+        summary = _summary_cache.get(_SUMMARY_CACHE_KEY)
+        if summary is not None:
+            return summary
+
+    if live:
+        # Both counts from a single scan of the table, bypassing the view
+        result = await db.execute(RISK_SUMMARY_SELECT)
+    else:
+        # Read the precomputed counts instead of scanning api_dependencies
+        result = await db.execute(text(f"SELECT total, high_risk FROM {RISK_SUMMARY_VIEW}"))
+    total_dependencies, high_risk_dependencies = result.one()
+
+    summary = {
         "total_dependencies": total_dependencies,
         "high_risk_dependencies": high_risk_dependencies,
         "risk_percentage": (high_risk_dependencies / total_dependencies * 100) if total_dependencies > 0 else 0
-    } 
\ No newline at end of file
+    }
+    if not live:
+        _summary_cache.set(_SUMMARY_CACHE_KEY, summary)
+    return summary
\ No newline at end of file
@@ -1,4 +1,4 @@
-from pydantic_settings import BaseSettings
+from pydantic_settings import BaseSettings, SettingsConfigDict
 from typing import Optional
 import os
 from dotenv import load_dotenv
@@ -9,6 +9,8 @@ class Settings(BaseSettings):
     PROJECT_NAME: str = "Pharmaceutical Supply Security Platform"
     VERSION: str = "1.0.0"
     API_V1_STR: str = "/api/v1"
+    # Development checks, e.g. raising on unplanned ORM lazy loads
+    DEBUG: bool = os.getenv("DEBUG", "false").lower() in ("1", "true", "yes")
     
     POSTGRES_SERVER: str = os.getenv("POSTGRES_SERVER", "localhost")
     POSTGRES_USER: str = os.getenv("POSTGRES_USER", "postgres")
@@ -16,13 +18,30 @@ class Settings(BaseSettings):
     POSTGRES_DB: str = os.getenv("POSTGRES_DB", "pharma_supply_security")
     SQLALCHEMY_DATABASE_URI: Optional[str] = None
 
+    # Connection pool. Size it as workers x concurrent queries per worker,
+    # keeping (pool size + overflow) x workers below max_connections.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT: int = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE: int = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+
+    # Seconds the risk summary is served from cache (in process and by clients)
+    RISK_SUMMARY_CACHE_TTL: int = int(os.getenv("RISK_SUMMARY_CACHE_TTL", "30"))
+
     @property
     def get_database_url(self) -> str:
         if self.SQLALCHEMY_DATABASE_URI:
             return self.SQLALCHEMY_DATABASE_URI
         return f"postgresql://{self.POSTGRES_USER}:{self.POSTGRES_PASSWORD}@{self.POSTGRES_SERVER}/{self.POSTGRES_DB}"
 
-    class Config:
-        case_sensitive = True
+    @property
+    def get_async_database_url(self) -> str:
+        url = self.get_database_url
+        if url.startswith("postgresql://"):
+            return url.replace("postgresql://", "postgresql+asyncpg://", 1)
+        return url
+
+    model_config = SettingsConfigDict(case_sensitive=True)
 
 settings = Settings() 
\ No newline at end of file
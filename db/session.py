@@ -1,13 +1,27 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from typing import AsyncIterator
 from app.core.config import settings
 
-engine = create_engine(settings.get_database_url, pool_pre_ping=True)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+def _connect_args() -> dict:
+    # asyncpg applies server_settings when each pooled connection is opened,
+    # so every query runs under the statement timeout.
+    if settings.get_async_database_url.startswith("postgresql+asyncpg"):
+        return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+    return {}
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close() 
\ No newline at end of file
+engine = create_async_engine(
+    settings.get_async_database_url,
+    poolclass=AsyncAdaptedQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+    connect_args=_connect_args(),
+)
+async_session = async_sessionmaker(engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_db() -> AsyncIterator[AsyncSession]:
+    async with async_session() as db:
+        yield db
\ No newline at end of file
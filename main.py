@@ -1,11 +1,27 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1.endpoints import api_dependency
+from app.api.v1.api import api_router
+from app.core.config import settings
+from app.db.session import engine
+from app.models.api_dependency import create_risk_summary_view
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the first pooled connection at startup so the first request does
+    # not pay for the connect and dialect initialization, and make sure the
+    # risk summary view exists on databases created before it was added
+    async with engine.begin() as conn:
+        await conn.run_sync(create_risk_summary_view)
+    yield
+    # Close pooled connections on shutdown
+    await engine.dispose()
 
 app = FastAPI(
     title="Pharmaceutical Supply Security Platform",
     description="A comprehensive platform for analyzing and managing pharmaceutical supply chain security",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS
@@ -24,11 +40,11 @@ async def root():
         "status": "operational"
     }
 
-# Import and include routers
-# from app.api.v1.endpoints import supply_chain, risk_assessment, economic_modeling
-# app.include_router(supply_chain.router, prefix="/api/v1/supply-chain", tags=["Supply Chain"])
-# app.include_router(risk_assessment.router, prefix="/api/v1/risk-assessment", tags=["Risk Assessment"])
-# app.include_router(economic_modeling.router, prefix="/api/v1/economic-modeling", tags=["Economic Modeling"])
-
 # Include routers
-app.include_router(api_dependency.router, prefix="/api/v1/api-dependencies", tags=["API Dependencies"]) 
\ No newline at end of file
+app.include_router(api_router, prefix=settings.API_V1_STR)
+
+if __name__ == "__main__":
+    import uvicorn
+
+    # uvloop and httptools replace the default asyncio loop and HTTP parser
+    uvicorn.run("app.main:app", host="0.0.0.0", port=8000, loop="uvloop", http="httptools")
\ No newline at end of file
@@ -1,4 +1,6 @@
-from sqlalchemy import Column, String, Float, ForeignKey, JSON
+import hashlib
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, JSON, DDL, Index, and_, event, func, inspect, select, text
+from sqlalchemy.engine import Connection
 from sqlalchemy.orm import relationship
 from app.models.base import BaseModel
 
@@ -19,6 +21,11 @@ class APIDependency(BaseModel):
     supply_chain_nodes = relationship("SupplyChainNode", back_populates="api_dependency")
     quality_incidents = relationship("QualityIncident", back_populates="api_dependency")
 
+    __table_args__ = (
+        # Serves the country filter and keyset pagination on id within it
+        Index("ix_api_dependencies_country_of_origin_id", "country_of_origin", "id"),
+    )
+
 class SupplyChainNode(BaseModel):
     __tablename__ = "supply_chain_nodes"
 
@@ -43,4 +50,77 @@ class QualityIncident(BaseModel):
     impact_assessment = Column(JSON)
 
     # Relationships
-    api_dependency = relationship("APIDependency", back_populates="quality_incidents") 
\ No newline at end of file
+    api_dependency = relationship("APIDependency", back_populates="quality_incidents") 
+
+# Built on table columns so compiling them at import time does not force
+# mapper configuration before every model module has been imported
+_api_dependencies = APIDependency.__table__
+
+# A dependency is high risk when the US relies heavily on imports of it
+# and its quality rating is low
+HIGH_RISK_MIN_IMPORT_DEPENDENCY = 70
+HIGH_RISK_MAX_QUALITY_RATING = 7
+
+HIGH_RISK_PREDICATE = and_(
+    _api_dependencies.c.us_import_dependency > HIGH_RISK_MIN_IMPORT_DEPENDENCY,
+    _api_dependencies.c.quality_rating < HIGH_RISK_MAX_QUALITY_RATING
+)
+
+# Total and high-risk counts computed in a single scan
+RISK_SUMMARY_SELECT = select(
+    func.count().label("total"),
+    func.count().filter(HIGH_RISK_PREDICATE).label("high_risk")
+).select_from(_api_dependencies)
+
+# Precomputed risk summary backing GET /risk-assessment/summary. The query
+# is formatted from a fixed template rather than compiled from
+# RISK_SUMMARY_SELECT, so its text, and the hash naming the view, only
+# change when the thresholds do. A changed definition gets a new view
+# instead of silently reusing a stale one.
+RISK_SUMMARY_QUERY = (
+    "SELECT 1 AS id, "
+    "COUNT(*) AS total, "
+    f"COUNT(*) FILTER (WHERE us_import_dependency > {HIGH_RISK_MIN_IMPORT_DEPENDENCY} "
+    f"AND quality_rating < {HIGH_RISK_MAX_QUALITY_RATING}) AS high_risk "
+    "FROM api_dependencies"
+)
+RISK_SUMMARY_VIEW_PREFIX = "api_dependency_risk_summary_"
+RISK_SUMMARY_VIEW = RISK_SUMMARY_VIEW_PREFIX + hashlib.sha1(RISK_SUMMARY_QUERY.encode()).hexdigest()[:8]
+
+def create_risk_summary_view(connection: Connection) -> None:
+    """Create the risk summary view if missing and drop views left by older definitions.
+
+    Idempotent; runs after api_dependencies is created and at application
+    startup, so existing databases pick up a new definition too.
+    """
+    if connection.dialect.name != "postgresql" or not inspect(connection).has_table("api_dependencies"):
+        return
+    # Building the view scans the whole table, and other workers wait on the
+    # lock below for as long as that takes; neither is bound by the
+    # connection-wide statement_timeout
+    connection.execute(text("SET LOCAL statement_timeout = 0"))
+    # Serialize workers starting at the same time
+    connection.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": RISK_SUMMARY_VIEW_PREFIX})
+    stale_views = connection.execute(
+        text(
+            "SELECT matviewname FROM pg_matviews "
+            "WHERE schemaname = current_schema() AND starts_with(matviewname, :prefix) AND matviewname <> :current"
+        ),
+        {"prefix": RISK_SUMMARY_VIEW_PREFIX, "current": RISK_SUMMARY_VIEW}
+    ).scalars().all()
+    for view in stale_views:
+        connection.execute(text(f'DROP MATERIALIZED VIEW IF EXISTS "{view}"'))
+    connection.execute(text(f"CREATE MATERIALIZED VIEW IF NOT EXISTS {RISK_SUMMARY_VIEW} AS {RISK_SUMMARY_QUERY}"))
+    # REFRESH ... CONCURRENTLY requires a unique index on the view
+    connection.execute(text(f"CREATE UNIQUE INDEX IF NOT EXISTS ix_{RISK_SUMMARY_VIEW}_id ON {RISK_SUMMARY_VIEW} (id)"))
+
+event.listen(
+    _api_dependencies,
+    "after_create",
+    lambda target, connection, **kw: create_risk_summary_view(connection)
+)
+event.listen(
+    _api_dependencies,
+    "before_drop",
+    DDL(f"DROP MATERIALIZED VIEW IF EXISTS {RISK_SUMMARY_VIEW}").execute_if(dialect="postgresql")
+)
\ No newline at end of file
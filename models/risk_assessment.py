@@ -1,14 +1,26 @@
-from sqlalchemy import Column, String, Float, ForeignKey, JSON, DateTime, Boolean, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Float, ForeignKey, JSON, DateTime, Boolean, Integer, Index, func, select
+from sqlalchemy.orm import Session, relationship
 from app.models.base import BaseModel
-from typing import Dict, List, Optional, Tuple, Any
-from datetime import datetime
+from typing import Deque, Dict, List, Mapping, Optional, Tuple, Any
+from types import MappingProxyType
+from bisect import bisect_left
+from collections import deque
+from datetime import datetime, timedelta
+import math
 from pydantic import BaseModel as PydanticBaseModel, Field
 import numpy as np
 from scipy import stats
 import pandas as pd
 from enum import Enum
 
+try:
+    from numba import njit
+except ImportError:  # Numba is optional; kernels then run as plain NumPy
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda func: func
+
 class RiskLevel(str, Enum):
     LOW = "low"
     MEDIUM = "medium"
@@ -38,20 +50,120 @@ class RiskAssessmentSchema(PydanticBaseModel):
     risk_level: RiskLevel
     recommendations: List[str] = Field(default_factory=list)
 
+@njit(cache=True)
+def _score_factors(probabilities: np.ndarray, impacts: np.ndarray, thresholds: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Score factors and bucket each score into the index of its risk level."""
+    scores = probabilities * impacts
+    levels = np.searchsorted(thresholds, scores)
+    # Scores above the last threshold fall into the highest level
+    levels = np.minimum(levels, len(thresholds) - 1).astype(np.int8)
+    return scores, levels
+
 class RiskAssessmentModel:
-    def __init__(self):
-        self.risk_factors: Dict[str, RiskFactorSchema] = {}
-        self.assessments: List[RiskAssessmentSchema] = []
+    def __init__(
+        self,
+        db: Optional[Session] = None,
+        history_size: Optional[int] = None,
+        name: str = "Risk assessment",
+        assessment_type: str = "supply_chain"
+    ):
+        # With a session, every assessment is also written to the
+        # risk_assessments table and trends are computed there
+        self.db = db
+        self.name = name
+        self.assessment_type = assessment_type
+        # Risk factors are stored column-wise: a row per factor name across
+        # parallel numeric arrays and Python lists for the descriptive fields.
+        # RiskFactorSchema objects are rebuilt only when handed out.
+        self._factor_rows: Dict[str, int] = {}
+        self._factor_names: List[str] = []
+        self._factor_categories: List[RiskCategory] = []
+        self._factor_descriptions: List[str] = []
+        self._factor_controls: List[List[str]] = []
+        self._factor_mitigation_actions: List[List[str]] = []
+        self._probabilities = np.empty(16, dtype=np.float64)
+        self._impacts = np.empty(16, dtype=np.float64)
+        # Unbounded by default. A cap only bounds what is kept in memory, so
+        # set one together with a session, which then holds the full history
+        # for trend queries; the trend window below shares the same cap.
+        self.history_size = history_size
+        self.assessments: Deque[RiskAssessmentSchema] = deque(maxlen=history_size)
         self.risk_thresholds = {
             RiskLevel.LOW: 0.3,
             RiskLevel.MEDIUM: 0.6,
             RiskLevel.HIGH: 0.8,
             RiskLevel.CRITICAL: 1.0
         }
+        # Running statistics over the default trend window, so trend reports
+        # do not rescan the whole assessment history
+        self.trend_window_days = 30
+        self._trend_window: Deque[Tuple[datetime, float, RiskLevel]] = deque()
+        self._trend_sum = 0.0
+        self._trend_sum_sq = 0.0
+        self._trend_level_counts: Dict[RiskLevel, int] = {level: 0 for level in RiskLevel}
+
+    @property
+    def risk_thresholds(self) -> Mapping[RiskLevel, float]:
+        """Upper score bound of each risk level; read-only, assign a new mapping to change it."""
+        return self._risk_thresholds
+
+    @risk_thresholds.setter
+    def risk_thresholds(self, thresholds: Mapping[RiskLevel, float]) -> None:
+        self._risk_thresholds = MappingProxyType(dict(thresholds))
+        # Thresholds in ascending order, parallel to the levels they bound
+        sorted_thresholds = sorted(thresholds.items(), key=lambda item: item[1])
+        self._threshold_levels: List[RiskLevel] = [level for level, _ in sorted_thresholds]
+        self._threshold_bounds: List[float] = [threshold for _, threshold in sorted_thresholds]
+        self._threshold_values = np.array(self._threshold_bounds, dtype=np.float64)
+
+    @property
+    def risk_factors(self) -> Mapping[str, RiskFactorSchema]:
+        """Risk factors keyed by name, in insertion order; read-only, use add_risk_factor to change them."""
+        return MappingProxyType({name: self._build_risk_factor(row) for name, row in self._factor_rows.items()})
 
     def add_risk_factor(self, factor: RiskFactorSchema) -> None:
-        """Add a new risk factor to the assessment model."""
-        self.risk_factors[factor.name] = factor
+        """Add a new risk factor to the assessment model, or replace the one with the same name.
+
+        This is the only way to change the stored factors.
+        """
+        row = self._factor_rows.get(factor.name)
+        if row is None:
+            row = len(self._factor_names)
+            if row == len(self._probabilities):
+                self._probabilities = np.resize(self._probabilities, 2 * row)
+                self._impacts = np.resize(self._impacts, 2 * row)
+            self._factor_rows[factor.name] = row
+            self._factor_names.append(factor.name)
+            self._factor_categories.append(factor.category)
+            self._factor_descriptions.append(factor.description)
+            self._factor_controls.append(factor.controls)
+            self._factor_mitigation_actions.append(factor.mitigation_actions)
+        else:
+            # Re-adding a factor by name replaces it in place
+            self._factor_categories[row] = factor.category
+            self._factor_descriptions[row] = factor.description
+            self._factor_controls[row] = factor.controls
+            self._factor_mitigation_actions[row] = factor.mitigation_actions
+        self._probabilities[row] = factor.probability
+        self._impacts[row] = factor.impact
+
+    def _build_risk_factor(self, row: int) -> RiskFactorSchema:
+        """Rebuild the schema object for a stored risk factor."""
+        # Values were validated when the factor was added
+        return RiskFactorSchema.model_construct(
+            name=self._factor_names[row],
+            category=self._factor_categories[row],
+            description=self._factor_descriptions[row],
+            probability=float(self._probabilities[row]),
+            impact=float(self._impacts[row]),
+            controls=self._factor_controls[row],
+            mitigation_actions=self._factor_mitigation_actions[row]
+        )
+
+    def _get_factor_arrays(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Return probabilities and impacts of all risk factors as parallel arrays."""
+        count = len(self._factor_names)
+        return self._probabilities[:count], self._impacts[:count]
 
     def calculate_risk_score(self, factor: RiskFactorSchema) -> float:
         """Calculate risk score for a single factor."""
@@ -59,40 +171,100 @@ class RiskAssessmentModel:
 
     def assess_risk_level(self, score: float) -> RiskLevel:
         """Determine risk level based on score."""
-        for level, threshold in self.risk_thresholds.items():
-            if score <= threshold:
-                return level
-        return RiskLevel.CRITICAL
+        # First threshold at or above the score; scores above all thresholds are critical
+        index = bisect_left(self._threshold_bounds, score)
+        if index == len(self._threshold_levels):
+            return RiskLevel.CRITICAL
+        return self._threshold_levels[index]
+
+    def assess_factor_risk_levels(self) -> Dict[str, RiskLevel]:
+        """Determine the risk level of every risk factor in one pass."""
+        probabilities, impacts = self._get_factor_arrays()
+        _, levels = _score_factors(probabilities, impacts, self._threshold_values)
+        return {
+            name: self._threshold_levels[level]
+            for name, level in zip(self._factor_names, levels.tolist())
+        }
 
     def perform_assessment(self) -> RiskAssessmentSchema:
         """Perform a comprehensive risk assessment."""
-        if not self.risk_factors:
+        if not self._factor_names:
             raise ValueError("No risk factors defined for assessment")
 
         # Calculate individual risk scores
-        risk_scores: List[float] = []
-        for factor in self.risk_factors.values():
-            score = self.calculate_risk_score(factor)
-            risk_scores.append(score)
+        probabilities, impacts = self._get_factor_arrays()
+        risk_scores, _ = _score_factors(probabilities, impacts, self._threshold_values)
 
         # Calculate overall risk score (weighted average)
-        overall_score = np.mean(risk_scores)
+        overall_score = float(risk_scores.mean())
         risk_level = self.assess_risk_level(overall_score)
 
         # Generate recommendations
-        recommendations = self._generate_recommendations(risk_level, list(self.risk_factors.values()))
+        factors = [self._build_risk_factor(row) for row in range(len(self._factor_names))]
+        recommendations = self._generate_recommendations(risk_level, factors)
 
         assessment = RiskAssessmentSchema(
             timestamp=datetime.utcnow(),
-            factors=list(self.risk_factors.values()),
+            factors=factors,
             overall_risk_score=overall_score,
             risk_level=risk_level,
             recommendations=recommendations
         )
 
         self.assessments.append(assessment)
+        self._add_to_trend_window(assessment)
+        if self.db is not None:
+            self._save_assessment(assessment)
         return assessment
 
+    def _save_assessment(self, assessment: RiskAssessmentSchema) -> "RiskAssessment":
+        """Persist an assessment to the risk_assessments table. The caller commits."""
+        db_assessment = RiskAssessment(
+            name=self.name,
+            assessment_type=self.assessment_type,
+            start_date=assessment.timestamp,
+            end_date=assessment.timestamp,
+            status="completed",
+            overall_risk_score=assessment.overall_risk_score,
+            risk_level=assessment.risk_level.value,
+            methodology="probability_impact",
+            findings={"factors": [f.model_dump(mode="json") for f in assessment.factors]},
+            recommendations=assessment.recommendations
+        )
+        self.db.add(db_assessment)
+        self.db.flush()
+        return db_assessment
+
+    def _add_to_trend_window(self, assessment: RiskAssessmentSchema) -> None:
+        """Add an assessment to the running trend statistics."""
+        # Evict here too, so the window stays bounded even if trends are never read
+        self._evict_from_trend_window(assessment.timestamp - timedelta(days=self.trend_window_days))
+        if self.history_size is not None and len(self._trend_window) == self.history_size:
+            # Match the assessment history, which drops its oldest entry too
+            self._pop_oldest_from_trend_window()
+        score = assessment.overall_risk_score
+        self._trend_window.append((assessment.timestamp, score, assessment.risk_level))
+        self._trend_sum += score
+        self._trend_sum_sq += score * score
+        self._trend_level_counts[assessment.risk_level] += 1
+
+    def _pop_oldest_from_trend_window(self) -> None:
+        """Remove the oldest assessment from the running trend statistics."""
+        _, score, level = self._trend_window.popleft()
+        self._trend_sum -= score
+        self._trend_sum_sq -= score * score
+        self._trend_level_counts[level] -= 1
+
+    def _evict_from_trend_window(self, cutoff_date: datetime) -> None:
+        """Drop assessments older than the cutoff from the running trend statistics."""
+        window = self._trend_window
+        while window and window[0][0] < cutoff_date:
+            self._pop_oldest_from_trend_window()
+        if not window:
+            # Start from exact zeros to keep rounding drift from accumulating
+            self._trend_sum = 0.0
+            self._trend_sum_sq = 0.0
+
     def _generate_recommendations(self, risk_level: RiskLevel, factors: List[RiskFactorSchema]) -> List[str]:
         """Generate recommendations based on risk level and factors."""
         recommendations = []
@@ -111,9 +283,15 @@ class RiskAssessmentModel:
 
     def get_risk_trends(self, days: int = 30) -> Dict[str, Any]:
         """Analyze risk trends over time."""
+        if self.db is not None:
+            return self._get_persisted_risk_trends(days)
+
         if not self.assessments:
             return {"error": "No assessment data available"}
 
+        if days == self.trend_window_days:
+            return self._get_window_trends()
+
         # Filter assessments within the specified time range
         cutoff_date = datetime.utcnow() - pd.Timedelta(days=days)
         recent_assessments = [
@@ -135,18 +313,74 @@ class RiskAssessmentModel:
 
         return trend_data
 
+    def _get_window_trends(self) -> Dict[str, Any]:
+        """Trend metrics for the default window from the running statistics."""
+        self._evict_from_trend_window(datetime.utcnow() - timedelta(days=self.trend_window_days))
+        count = len(self._trend_window)
+        if count == 0:
+            return {"error": "No assessments in the specified time range"}
+
+        mean_score = self._trend_sum / count
+        variance = max(self._trend_sum_sq / count - mean_score * mean_score, 0.0)
+        return {
+            "mean_score": mean_score,
+            "std_score": math.sqrt(variance),
+            "trend_direction": "increasing" if self._trend_window[-1][1] > self._trend_window[0][1] else "decreasing",
+            "risk_level_distribution": {
+                level: self._trend_level_counts[level] / count for level in RiskLevel
+            }
+        }
+
+    def _get_persisted_risk_trends(self, days: int) -> Dict[str, Any]:
+        """Trend metrics over persisted assessments, aggregated in the database."""
+        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        in_range = RiskAssessment.start_date >= cutoff_date
+        score = RiskAssessment.overall_risk_score
+
+        first_score = select(score).where(in_range).order_by(
+            RiskAssessment.start_date.asc(), RiskAssessment.id.asc()
+        ).limit(1).scalar_subquery()
+        last_score = select(score).where(in_range).order_by(
+            RiskAssessment.start_date.desc(), RiskAssessment.id.desc()
+        ).limit(1).scalar_subquery()
+        count, mean_score, std_score, first, last = self.db.execute(
+            select(
+                func.count(),
+                func.avg(score),
+                func.stddev_pop(score),
+                first_score,
+                last_score
+            ).where(in_range)
+        ).one()
+        if count == 0:
+            return {"error": "No assessments in the specified time range"}
+
+        level_counts = dict(
+            self.db.execute(
+                select(RiskAssessment.risk_level, func.count()).where(in_range).group_by(RiskAssessment.risk_level)
+            ).all()
+        )
+
+        return {
+            "mean_score": float(mean_score),
+            "std_score": float(std_score),
+            "trend_direction": "increasing" if last > first else "decreasing",
+            "risk_level_distribution": {
+                level: level_counts.get(level.value, 0) / count for level in RiskLevel
+            }
+        }
+
     def _calculate_risk_distribution(self, assessments: List[RiskAssessmentSchema]) -> Dict[RiskLevel, float]:
         """Calculate distribution of risk levels in assessments."""
         total = len(assessments)
         if total == 0:
             return {level: 0.0 for level in RiskLevel}
 
-        distribution = {}
-        for level in RiskLevel:
-            count = sum(1 for a in assessments if a.risk_level == level)
-            distribution[level] = count / total
+        levels = np.array([a.risk_level.value for a in assessments])
+        values, counts = np.unique(levels, return_counts=True)
+        counts_by_value = dict(zip(values.tolist(), counts.tolist()))
 
-        return distribution
+        return {level: counts_by_value.get(level.value, 0) / total for level in RiskLevel}
 
     def get_risk_report(self) -> Dict[str, Any]:
         """Generate a comprehensive risk report."""
@@ -179,6 +413,7 @@ class RiskAssessment(BaseModel):
     end_date = Column(DateTime, nullable=True)
     status = Column(String, nullable=False)  # e.g., "draft", "in_progress", "completed"
     overall_risk_score = Column(Float, nullable=False)
+    risk_level = Column(String, nullable=True)  # RiskLevel value; null on rows written before it was added
     methodology = Column(String, nullable=False)
     assumptions = Column(JSON)
     findings = Column(JSON)
@@ -189,6 +424,11 @@ class RiskAssessment(BaseModel):
     mitigation_strategies = relationship("MitigationStrategy", back_populates="assessment")
     monitoring_metrics = relationship("RiskMonitoringMetric", back_populates="assessment")
 
+    __table_args__ = (
+        # Trend queries are range scans over the most recent assessments
+        Index("ix_risk_assessments_start_date", start_date.desc()),
+    )
+
 class RiskFactor(BaseModel):
     __tablename__ = "risk_factors"
 
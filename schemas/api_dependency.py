@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
 
@@ -18,8 +18,7 @@ class SupplyChainNode(SupplyChainNodeBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class QualityIncidentBase(BaseModel):
     incident_type: str
@@ -37,8 +36,7 @@ class QualityIncident(QualityIncidentBase):
     created_at: datetime
     updated_at: datetime
 
-    class Config:
-        from_attributes = True
+    model_config = ConfigDict(from_attributes=True)
 
 class APIDependencyBase(BaseModel):
     name: str
@@ -61,5 +59,8 @@ class APIDependency(APIDependencyBase):
     supply_chain_nodes: List[SupplyChainNode] = []
     quality_incidents: List[QualityIncident] = []
 
-    class Config:
-        from_attributes = True 
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True) 
+
+class APIDependencyPage(BaseModel):
+    items: List[APIDependency]
+    next_cursor: Optional[int] = None
\ No newline at end of file